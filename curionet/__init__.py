@@ -4,4 +4,22 @@
  * Licensing information can found in 'LICENSE', which is part of this source code package.
 """
 
+import importlib
+
 __version__ = u'1.0.1'
+
+# submodules are only imported once they are first accessed, so tools which
+# only need io or task don't pay for importing curio and the network stack.
+__all__ = ['io', 'task', 'network', 'simulation']
+
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+    module = importlib.import_module('%s.%s' % (__name__, name))
+    globals()[name] = module
+
+    return module
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,6 +5,9 @@
 """
 
 import struct
+import bisect
+
+from contextlib import contextmanager
 
 class Endianness(object):
     """
@@ -146,3 +149,208 @@ class DataBufferIO(object):
 
     def write_char(self, value):
         self.write_to('s', value)
+
+class PooledDataBufferIO(DataBufferIO):
+    """
+    A data buffer backed by a preallocated bytearray, which is reused through a data buffer pool
+    """
+
+    def __init__(self, pool, capacity):
+        self.pool = pool
+        self.buffer = bytearray(capacity)
+        self.length = 0
+        self.offset = 0
+        self.released = False
+        self.generation = 0
+
+    @property
+    def capacity(self):
+        return len(self.buffer)
+
+    @property
+    def data(self):
+        return memoryview(self.buffer)[:self.length]
+
+    def reserve(self, length):
+        """
+        Grows the buffer to the next size class, if the length does not fit,
+        past the largest size class the buffer at least doubles in size
+        """
+
+        required = self.length + length
+
+        if required <= self.capacity:
+            return
+
+        if self.pool.size_classes and required <= self.pool.size_classes[-1]:
+            capacity = self.pool.size_class(required)
+        else:
+            capacity = max(required, self.capacity * 2)
+
+        buffer = bytearray(capacity)
+        buffer[:self.length] = self.buffer[:self.length]
+        self.buffer = buffer
+
+    def write(self, data):
+        if not data:
+            return
+
+        length = len(data)
+        self.reserve(length)
+
+        self.buffer[self.length:self.length + length] = data
+        self.length += length
+
+    def write_to(self, fmt, *args):
+        fmt = self.byte_order + fmt
+        length = struct.calcsize(fmt)
+        self.reserve(length)
+
+        struct.pack_into(fmt, self.buffer, self.length, *args)
+        self.length += length
+
+    def clear(self):
+        self.length = 0
+        self.offset = 0
+
+    def release(self, generation=None):
+        """
+        Returns the buffer to it's pool, the buffer must not be used afterwards
+        """
+
+        self.pool.release(self, generation)
+
+class DataBufferPoolError(DataBufferError):
+    """
+    A data buffer pool specific io error
+    """
+
+class DataBufferPool(object):
+    """
+    A pool of reusable size classed data buffers, to avoid allocating
+    a new buffer for every outgoing message
+    """
+
+    SIZE_CLASSES = (256, 1024, 4096, 16384, 65536)
+    MAX_FREE = 64
+
+    def __init__(self, size_classes=SIZE_CLASSES, max_free=MAX_FREE):
+        self.size_classes = sorted(size_classes)
+        self.max_free = max_free
+        self.free = dict((size, []) for size in self.size_classes)
+
+        self.hits = 0
+        self.misses = 0
+        self.in_use = 0
+        self.high_water = 0
+
+    def size_class(self, length):
+        """
+        Returns the smallest size class the length fits in, lengths
+        larger than every size class are returned as is
+        """
+
+        index = bisect.bisect_left(self.size_classes, length)
+
+        if index == len(self.size_classes):
+            return length
+
+        return self.size_classes[index]
+
+    def acquire(self, length=0):
+        """
+        Takes a cleared buffer from the pool that can hold at least length bytes,
+        the buffer is returned to the pool when released or sent by a handler
+        """
+
+        size = self.size_class(length)
+        buffer = None
+
+        # take a buffer from the smallest size class that has one free,
+        # buffers which have grown are filed under their larger size class.
+        for index in range(bisect.bisect_left(self.size_classes, size), len(self.size_classes)):
+            free = self.free[self.size_classes[index]]
+
+            if free:
+                buffer = free.pop()
+                break
+
+        if buffer is not None:
+            buffer.released = False
+            buffer.generation += 1
+            self.hits += 1
+        else:
+            buffer = PooledDataBufferIO(self, size)
+            self.misses += 1
+
+        self.in_use += 1
+        self.high_water = max(self.high_water, self.in_use)
+
+        return buffer
+
+    def release(self, buffer, generation=None):
+        """
+        Returns a buffer to the pool, releasing an already released buffer does nothing.
+        If a generation is specified, the buffer is only released if it has not been
+        acquired again since that generation
+        """
+
+        if buffer.pool is not self:
+            raise DataBufferPoolError('Failed to release buffer, it belongs to another pool!')
+
+        if buffer.released:
+            return
+
+        # the buffer was released and handed out again in the meantime,
+        # it now belongs to another owner...
+        if generation is not None and generation != buffer.generation:
+            return
+
+        buffer.released = True
+        buffer.clear()
+        self.in_use -= 1
+
+        # buffers which outgrew every size class are left to the garbage collector,
+        # as are buffers beyond the maximum amount kept for a size class.
+        free = self.free.get(buffer.capacity)
+
+        if free is not None and len(free) < self.max_free:
+            free.append(buffer)
+
+    @contextmanager
+    def buffer(self, length=0):
+        """
+        Acquires a buffer for the duration of a with block, sending the buffer
+        through a handler inside the block releases it early
+        """
+
+        buffer = self.acquire(length)
+        generation = buffer.generation
+
+        try:
+            yield buffer
+        finally:
+            self.release(buffer, generation)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+
+        if not total:
+            return 0.0
+
+        return self.hits / total
+
+    def stats(self):
+        """
+        Returns the pool statistics as a dictionary
+        """
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'in_use': self.in_use,
+            'high_water': self.high_water,
+            'free': dict((size, len(free)) for (size, free) in self.free.items()),
+        }
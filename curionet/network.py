@@ -4,7 +4,357 @@
  * Licensing information can found in 'LICENSE', which is part of this source code package.
 """
 
-from curio import socket, run, spawn
+import os
+import stat
+import errno
+import array
+import struct
+import inspect
+
+from curio import socket, run, spawn, current_task, Event, Lock, TaskGroup, ignore_after
+from curio import traps
+
+from curionet.io import DataBufferIO, PooledDataBufferIO, DataBufferPoolError, Endianness
+
+class NetworkAddressError(ValueError):
+    """
+    A network address specific value error
+    """
+
+class NetworkAddress(object):
+    """
+    An address which resolves the socket family of an (address, port) pair,
+    supports ipv4, ipv6, unix domain socket paths (unix:/path) and abstract
+    unix domain sockets (unix:@name)
+    """
+
+    UNIX_PREFIX = 'unix:'
+    ABSTRACT_PREFIX = '@'
+
+    def __init__(self, address, port=None):
+        if isinstance(address, NetworkAddress):
+            (self.family, self.address, self.port) = (address.family, address.address, address.port)
+            return
+
+        if isinstance(address, tuple):
+            (address, port) = address[:2]
+
+        if not isinstance(address, str):
+            raise NetworkAddressError('Invalid network address %r!' % (address,))
+
+        if address.startswith(self.UNIX_PREFIX):
+            address = address[len(self.UNIX_PREFIX):]
+
+            if not address:
+                raise NetworkAddressError('Invalid unix socket address, no path specified!')
+
+            if address.startswith(self.ABSTRACT_PREFIX):
+                address = '\0' + address[len(self.ABSTRACT_PREFIX):]
+
+            self.family = socket.AF_UNIX
+            port = None
+        elif ':' in address:
+            self.family = socket.AF_INET6
+            address = address.strip('[]')
+        else:
+            self.family = socket.AF_INET
+
+        if self.family != socket.AF_UNIX and port is None:
+            raise NetworkAddressError('Invalid network address (%s), no port specified!' % address)
+
+        self.address = address
+        self.port = port
+
+    @property
+    def is_unix(self):
+        return self.family == socket.AF_UNIX
+
+    @property
+    def is_abstract(self):
+        return self.is_unix and self.address.startswith('\0')
+
+    @property
+    def sockaddr(self):
+        if self.is_unix:
+            return self.address
+
+        return (self.address, self.port)
+
+    def socket(self):
+        """
+        Creates a new stream socket for the address family
+        """
+
+        return socket.socket(self.family, socket.SOCK_STREAM)
+
+    def __eq__(self, other):
+        return isinstance(other, NetworkAddress) and self.sockaddr == other.sockaddr
+
+    def __hash__(self):
+        return hash(self.sockaddr)
+
+    def __str__(self):
+        if self.is_abstract:
+            return '%s%s%s' % (self.UNIX_PREFIX, self.ABSTRACT_PREFIX, self.address[1:])
+        elif self.is_unix:
+            return '%s%s' % (self.UNIX_PREFIX, self.address)
+        elif self.family == socket.AF_INET6:
+            return '[%s]:%d' % (self.address, self.port)
+
+        return '%s:%d' % (self.address, self.port)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, str(self))
+
+class NetworkDispatcherError(RuntimeError):
+    """
+    A network dispatcher specific runtime error
+    """
+
+class NetworkRoute(object):
+    """
+    A single dispatch table entry, the coroutine function registered for an opcode
+    along with it's optional precompiled decoder and the number of messages routed
+    """
+
+    def __init__(self, opcode, function, decoder=None):
+        self.opcode = opcode
+        self.function = function
+        self.decoder = decoder
+        self.count = 0
+
+class NetworkDispatcher(object):
+    """
+    A dispatch table which routes messages to coroutines by their leading opcode
+    """
+
+    OPCODE_FORMAT = 'H'
+
+    def __init__(self, byte_order=Endianness.NETWORK):
+        self.byte_order = byte_order
+        self.routes = {}
+        self.default = None
+        self.unknown = 0
+
+        self.__opcode = struct.Struct(byte_order + self.OPCODE_FORMAT)
+
+    def has_route(self, opcode):
+        return opcode in self.routes
+
+    def add_route(self, opcode, function, schema=None):
+        """
+        Registers a coroutine function for an opcode, if a struct schema is specified
+        the message is decoded with it and the values are passed as arguments, otherwise
+        a data buffer positioned after the opcode is passed
+        """
+
+        if self.has_route(opcode):
+            raise NetworkDispatcherError('Failed to add route for opcode %d, already registered!' % opcode)
+
+        decoder = None
+
+        if schema is not None:
+            decoder = struct.Struct(self.byte_order + schema)
+
+        self.routes[opcode] = NetworkRoute(opcode, function, decoder)
+        return function
+
+    def remove_route(self, opcode):
+        if not self.has_route(opcode):
+            raise NetworkDispatcherError('Failed to remove route for opcode %d, never registered!' % opcode)
+
+        del self.routes[opcode]
+
+    def route(self, opcode, schema=None):
+        """
+        A decorator method for registering a coroutine function for an opcode
+        """
+
+        def decorate(function):
+            return self.add_route(opcode, function, schema)
+
+        return decorate
+
+    def fallback(self, function):
+        """
+        A decorator method for registering the coroutine function called with
+        (target, opcode, data buffer) for opcodes without a route
+        """
+
+        self.default = function
+        return function
+
+    async def dispatch(self, target, data):
+        """
+        Decodes the leading opcode of a message and awaits the routed coroutine function
+        with the target (usually the handler or connector) as it's first argument,
+        messages too short to decode raise a network dispatcher error
+        """
+
+        if isinstance(data, DataBufferIO):
+            (data, offset) = (data.data, data.offset)
+        else:
+            offset = 0
+
+        if len(data) - offset < self.__opcode.size:
+            raise NetworkDispatcherError('Failed to dispatch message, too short for an opcode!')
+
+        (opcode,) = self.__opcode.unpack_from(data, offset)
+        offset += self.__opcode.size
+
+        route = self.routes.get(opcode)
+
+        if route is None:
+            self.unknown += 1
+
+            if self.default is None:
+                return None
+
+            return await self.default(target, opcode, DataBufferIO(data, offset))
+
+        if route.decoder is not None and len(data) - offset < route.decoder.size:
+            raise NetworkDispatcherError('Failed to dispatch message for opcode %d, expected %d bytes!' % (
+                opcode, route.decoder.size))
+
+        route.count += 1
+
+        if route.decoder is not None:
+            return await route.function(target, *route.decoder.unpack_from(data, offset))
+
+        return await route.function(target, DataBufferIO(data, offset))
+
+    @property
+    def counters(self):
+        """
+        Returns the number of messages routed per opcode
+        """
+
+        return dict((opcode, route.count) for (opcode, route) in self.routes.items())
+
+    def reset_counters(self):
+        for route in self.routes.values():
+            route.count = 0
+
+        self.unknown = 0
+
+SENDFILE_FALLBACK_ERRORS = (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP, errno.ESPIPE)
+
+# curio has no public api to wait on a raw file descriptor, these wrap it's
+# private traps (as of curio 1.6) so only they need to change with curio...
+async def _wait_readable(fd):
+    await traps._read_wait(fd)
+
+async def _wait_writable(fd):
+    await traps._write_wait(fd)
+
+def _seekable(fd):
+    try:
+        os.lseek(fd, 0, os.SEEK_CUR)
+    except OSError as e:
+        if e.errno != errno.ESPIPE:
+            raise
+
+        return False
+
+    return True
+
+async def _send_file(connection, lock, file, offset, count, chunk_size, progress, use_sendfile=True):
+    """
+    Streams part of a file to a connection chunk by chunk, using the zero-copy
+    os.sendfile where possible and a reused memoryview buffer otherwise. The send lock
+    is only held for a single chunk, so other messages are interleaved between chunks.
+    Non-seekable files such as pipes are streamed from their current position until
+    the end of file when no count is specified
+    """
+
+    if isinstance(file, int):
+        fd = file
+    elif hasattr(file, 'fileno'):
+        fd = file.fileno()
+    else:
+        with open(file, 'rb') as f:
+            return await _send_file(connection, lock, f.fileno(), offset, count, chunk_size,
+                progress, use_sendfile)
+
+    seekable = _seekable(fd)
+
+    if not seekable:
+        if offset:
+            raise ValueError('Failed to send file, an offset can not be used with a non-seekable file!')
+
+        use_sendfile = False
+    elif count is None:
+        count = max(os.fstat(fd).st_size - offset, 0)
+
+    use_sendfile = use_sendfile and hasattr(os, 'sendfile')
+    buffer = None
+    sent = 0
+
+    # pipes are usually blocking, a read on them would block the whole kernel
+    # so the file is read non-blocking while it is streamed...
+    blocking = os.get_blocking(fd)
+
+    if blocking and not seekable:
+        os.set_blocking(fd, False)
+
+    try:
+        while count is None or sent < count:
+            if count is None:
+                length = chunk_size
+            else:
+                length = min(chunk_size, count - sent)
+
+            async with lock:
+                if use_sendfile:
+                    try:
+                        nsent = os.sendfile(connection.fileno(), fd, offset + sent, length)
+                    except BlockingIOError:
+                        await _wait_writable(connection.fileno())
+                        continue
+                    except OSError as e:
+                        if e.errno not in SENDFILE_FALLBACK_ERRORS:
+                            raise
+
+                        # the socket or file does not support sendfile,
+                        # fallback to copying through a user space buffer...
+                        use_sendfile = False
+                        continue
+                else:
+                    if buffer is None:
+                        buffer = memoryview(bytearray(length))
+
+                    try:
+                        if seekable:
+                            nsent = os.preadv(fd, [buffer[:length]], offset + sent)
+                        else:
+                            nsent = os.readv(fd, [buffer[:length]])
+                    except BlockingIOError:
+                        nsent = None
+                    else:
+                        await connection.sendall(buffer[:nsent])
+
+            # the file is waited on without holding the send lock,
+            # so other messages are still sent in the meantime...
+            if nsent is None:
+                await _wait_readable(fd)
+                continue
+
+            # the end of the file has been reached...
+            if not nsent:
+                break
+
+            sent += nsent
+
+            if progress:
+                result = progress(sent, count)
+
+                if inspect.isawaitable(result):
+                    await result
+    finally:
+        if blocking and not seekable:
+            os.set_blocking(fd, True)
+
+    return sent
 
 class NetworkHandlerError(RuntimeError):
     """
@@ -17,12 +367,17 @@ class NetworkHandler(object):
     """
 
     BUFFER_SIZE = 1024
+    FILE_CHUNK_SIZE = 65536
+    USE_SENDFILE = True
 
     def __init__(self, factory, connection, address):
         self.factory = factory
         self.connection = connection
         self.address = address
         self.task = None
+        self.connected = True
+
+        self.__send_lock = Lock()
 
     async def __update(self):
         try:
@@ -39,22 +394,54 @@ class NetworkHandler(object):
         await self.factory.add_handler(self)
 
         async with self.connection:
-            while True:
+            while self.connected:
                 await self.__update()
 
     async def handle_connected(self):
         pass
 
     async def handle_send(self, data):
+        if isinstance(data, PooledDataBufferIO):
+            if data.released:
+                raise DataBufferPoolError('Failed to send data buffer, it was already released!')
+
+            generation = data.generation
+
         try:
-            await self.connection.sendall(data)
+            async with self.__send_lock:
+                if isinstance(data, DataBufferIO):
+                    await self.connection.sendall(data.data)
+                else:
+                    await self.connection.sendall(data)
         except socket.error:
             return await self.handle_disconnect()
+        finally:
+            # pooled buffers are returned to their pool once sent
+            if isinstance(data, PooledDataBufferIO):
+                data.release(generation)
+
+    async def send_file(self, file, offset=0, count=None, progress=None):
+        """
+        Streams a file (path, file descriptor or file object) to the connection without
+        loading it into memory, progress is called with (sent, count) after every chunk,
+        count is None when streaming a non-seekable file until the end of file
+        """
+
+        try:
+            return await _send_file(self.connection, self.__send_lock, file, offset, count,
+                self.FILE_CHUNK_SIZE, progress, self.USE_SENDFILE)
+        except ConnectionError:
+            return await self.handle_disconnect()
 
     async def handle_received(self, data):
         pass
 
     async def handle_disconnect(self):
+        if not self.connected:
+            return
+
+        self.connected = False
+
         await self.connection.close()
         await self.factory.remove_handler(self)
         await self.handle_join()
@@ -62,11 +449,27 @@ class NetworkHandler(object):
     async def handle_disconnected(self):
         pass
 
+    async def handle_drain(self):
+        """
+        Called once the factory starts draining, the handler should finish up any
+        outstanding work and disconnect before the factory's drain timeout expires
+        """
+
     async def handle_join(self):
+        """
+        Waits for the handler task to finish, when called from outside the handler task
+        (for example from a drain hook) the task is still waiting on it's closed
+        connection and is cancelled instead
+        """
+
         if not self.task:
             return
 
-        await self.task.join()
+        # the handler task stops on it's own once disconnected
+        if self.task is await current_task():
+            return
+
+        await self.task.cancel()
 
 class NetworkFactoryError(RuntimeError):
     """
@@ -78,17 +481,41 @@ class NetworkFactory(object):
     A factory instance which manages connection handlers
     """
 
-    def __init__(self, address, port, handler, backlog=100):
+    DRAIN_TIMEOUT = 30.0
+
+    def __init__(self, address, port, handler, backlog=100, handoff=None):
         self.address = address
         self.port = port
+        self.endpoint = NetworkAddress(address, port)
         self.handler = handler
         self.backlog = backlog
+        self.handoff = handoff
+        self.drain_timeout = self.DRAIN_TIMEOUT
 
-        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
+        # the listening socket is created once the factory is ran
+        self.__socket = None
+
+        self.__draining = Event()
+        self.__drained = Event()
+        self.__handoff_task = None
 
         self.handlers = []
 
+    @property
+    def draining(self):
+        return self.__draining.is_set()
+
+    @property
+    def sockname(self):
+        """
+        Returns the address the listening socket is bound to, once the factory is ran
+        """
+
+        if not self.__socket:
+            return None
+
+        return self.__socket.getsockname()
+
     def has_handler(self, handler):
         return handler in self.handlers
 
@@ -106,54 +533,264 @@ class NetworkFactory(object):
         self.handlers.remove(handler)
         await handler.handle_disconnected()
 
+        if self.draining and not self.handlers:
+            await self.__drained.set()
+
     async def handle_start(self):
         pass
 
+    async def __receive_listener(self):
+        """
+        Attempts to receive an already listening socket from a previous process
+        over the handoff unix socket, returns true if the socket was adopted
+        """
+
+        if self.handoff is None or not os.path.exists(self.handoff):
+            return False
+
+        handoff = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        async with handoff:
+            try:
+                await handoff.connect(self.handoff)
+            except socket.error:
+                # nobody is serving the handoff socket, it was left behind
+                # by a previous process that has since exited...
+                return False
+
+            fds = array.array('i')
+            (data, ancdata, flags, address) = await handoff.recvmsg(1, socket.CMSG_LEN(fds.itemsize))
+
+            for (level, type, cmsg) in ancdata:
+                if level == socket.SOL_SOCKET and type == socket.SCM_RIGHTS:
+                    fds.frombytes(cmsg[:len(cmsg) - (len(cmsg) % fds.itemsize)])
+
+            # the previous process is already draining and has closed it's
+            # listening socket, bind a new one instead...
+            if not fds:
+                return False
+
+            self.__socket = socket.socket(fileno=fds[0])
+
+            # let the previous process know it may start draining,
+            # the listening socket is now shared between both processes.
+            await handoff.sendall(b'\x01')
+
+        return True
+
+    async def __unlink_socket(self, path, probe=True):
+        """
+        Removes a unix socket path left behind by a previous process, when probing
+        a path that is still being served is left untouched
+        """
+
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            return
+
+        if not stat.S_ISSOCK(mode):
+            raise NetworkFactoryError('Failed to remove unix socket path (%s), not a socket!' % path)
+
+        if probe:
+            async with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                try:
+                    await connection.connect(path)
+                except socket.error:
+                    pass
+                else:
+                    return
+
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    async def __listen(self):
+        if await self.__receive_listener():
+            return
+
+        if self.endpoint.is_unix and not self.endpoint.is_abstract:
+            await self.__unlink_socket(self.endpoint.address)
+
+        self.__socket = self.endpoint.socket()
+
+        if not self.endpoint.is_unix:
+            self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
+
+        try:
+            self.__socket.bind(self.endpoint.sockaddr)
+        except socket.error:
+            raise NetworkFactoryError('Failed to bind socket on address (%s)!' % self.endpoint)
+
+        try:
+            self.__socket.listen(self.backlog)
+        except socket.error:
+            raise NetworkFactoryError('Failed to listen on socket!')
+
+    async def __handoff(self):
+        """
+        Serves the listening socket to a replacement process over the handoff unix socket,
+        once the replacement has adopted the socket this factory starts draining
+        """
+
+        # the handoff path may still be bound by the previous process,
+        # which is about to drain, so it's removed without probing.
+        await self.__unlink_socket(self.handoff, probe=False)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.handoff)
+        server.listen(1)
+
+        async with server:
+            while not self.draining:
+                (connection, address) = await server.accept()
+
+                async with connection:
+                    try:
+                        await connection.sendmsg([b'\x00'], [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                            array.array('i', [self.__socket.fileno()]))])
+
+                        acknowledged = await connection.recv(1)
+                    except socket.error:
+                        continue
+
+                # the replacement process went away before adopting the socket,
+                # keep on serving and wait for the next one...
+                if not acknowledged:
+                    continue
+
+                await self.handle_drain()
+
+    async def __spawn_handler(self, connection, address):
+        handler = self.handler(self, connection, address)
+        handler.task = await spawn(handler.handle_connect, daemon=True)
+
+        return handler
+
     async def __update(self):
         try:
             (connection, address) = await self.__socket.accept()
         except socket.error:
             raise NetworkFactoryError('An error occurred, when trying to accept an incoming connection!')
 
-        handler = self.handler(self, connection, address)
-        handler.task = await spawn(handler.handle_connect)
+        await self.__spawn_handler(connection, address)
+
+    async def handle_socketpair(self):
+        """
+        Creates a connected unix socket pair for an in-process peer, one end is served
+        by a new handler and the other end is returned to be passed to a connector
+        """
+
+        if self.draining:
+            raise NetworkFactoryError('Failed to create socket pair, factory is draining!')
+
+        (connection, peer) = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        await self.__spawn_handler(connection, connection.getsockname())
+
+        return peer
+
+    async def __accept(self):
+        while True:
+            await self.__update()
 
     async def execute(self):
+        await self.__listen()
         await self.handle_start()
 
-        async with self.__socket:
-            while True:
-                await self.__update()
+        if self.handoff is not None:
+            self.__handoff_task = await spawn(self.__handoff, daemon=True)
 
-            await self.handle_disconnect()
+        # accept incoming connections until either the factory
+        # starts draining or accepting a connection fails.
+        async with TaskGroup(wait=any) as group:
+            await group.spawn(self.__accept)
+            await group.spawn(self.__draining.wait)
+
+        if group.exception:
+            raise group.exception
+
+        await self.handle_disconnect()
 
     async def handle_send(self, data, exceptions=[]):
-        for handler in self.handlers:
+        if isinstance(data, PooledDataBufferIO):
+            if data.released:
+                raise DataBufferPoolError('Failed to send data buffer, it was already released!')
 
-            if handler in exceptions:
-                continue
+            generation = data.generation
 
-            await handler.handle_send(data)
+        try:
+            if isinstance(data, DataBufferIO):
+                payload = data.data
+            else:
+                payload = data
+
+            for handler in self.handlers:
+
+                if handler in exceptions:
+                    continue
+
+                await handler.handle_send(payload)
+        finally:
+            # pooled buffers are returned to their pool once
+            # they have been sent to every handler.
+            if isinstance(data, PooledDataBufferIO):
+                data.release(generation)
+
+    async def handle_drain(self, timeout=None):
+        """
+        Stops accepting new connections and gives the connected handlers
+        until the drain timeout to finish up before they are disconnected
+        """
+
+        if self.draining:
+            return
+
+        if timeout is not None:
+            self.drain_timeout = timeout
+
+        await self.__draining.set()
+
+    async def __drain_handlers(self):
+        async with TaskGroup() as group:
+            for handler in list(self.handlers):
+                await group.spawn(handler.handle_drain)
+
+        if self.handlers:
+            await self.__drained.wait()
+
+    async def __drain(self):
+        # the drain hooks run concurrently within the drain timeout,
+        # so a single slow handler can't hold up the whole factory.
+        await ignore_after(self.drain_timeout, self.__drain_handlers)
+
+        # forcibly disconnect any handlers that did not finish in time,
+        # cancelling the handler task closes it's connection.
+        for handler in list(self.handlers):
+            if handler.task:
+                await handler.task.cancel()
+
+            await self.remove_handler(handler)
 
     async def handle_disconnect(self):
-        await self.__socket.close()
+        # stop serving the handoff socket, the listening socket
+        # is about to be closed and can no longer be handed off.
+        if self.__handoff_task:
+            await self.__handoff_task.cancel()
+
+        if self.__socket:
+            await self.__socket.close()
+
+        if not self.draining:
+            await self.__draining.set()
+
+        await self.__drain()
         await self.handle_stop()
 
     async def handle_stop(self):
         pass
 
     def run(self):
-        try:
-            self.__socket.bind((self.address, self.port))
-        except socket.error:
-            raise NetworkFactoryError('Failed to bind socket on address (%s:%d)!' % (self.address,
-                self.port))
-
-        try:
-            self.__socket.listen(self.backlog)
-        except socket.error:
-            raise NetworkFactoryError('Failed to listen on socket!')
-
         return run(self.execute)
 
 class NetworkConnectorError(RuntimeError):
@@ -167,12 +804,19 @@ class NetworkConnector(object):
     """
 
     BUFFER_SIZE = 1024
+    FILE_CHUNK_SIZE = 65536
+    USE_SENDFILE = True
 
-    def __init__(self, address, port):
+    def __init__(self, address, port, connection=None):
         self.address = address
         self.port = port
+        self.endpoint = NetworkAddress(address, port)
+        self.connected = connection is not None
 
-        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # the socket is created once the connector is ran,
+        # unless an already connected socket was specified.
+        self.__socket = connection
+        self.__send_lock = Lock()
     
     async def __update(self):
         try:
@@ -189,32 +833,74 @@ class NetworkConnector(object):
         pass
 
     async def handle_send(self, data):
+        if not self.connected:
+            raise NetworkConnectorError('Failed to send data, connector is not connected!')
+
+        if isinstance(data, PooledDataBufferIO):
+            if data.released:
+                raise DataBufferPoolError('Failed to send data buffer, it was already released!')
+
+            generation = data.generation
+
         try:
-            await self.__socket.sendall(data)
+            async with self.__send_lock:
+                if isinstance(data, DataBufferIO):
+                    await self.__socket.sendall(data.data)
+                else:
+                    await self.__socket.sendall(data)
         except socket.error:
             return await self.handle_disconnect()
+        finally:
+            # pooled buffers are returned to their pool once sent
+            if isinstance(data, PooledDataBufferIO):
+                data.release(generation)
+
+    async def send_file(self, file, offset=0, count=None, progress=None):
+        """
+        Streams a file (path, file descriptor or file object) to the server without
+        loading it into memory, progress is called with (sent, count) after every chunk,
+        count is None when streaming a non-seekable file until the end of file
+        """
+
+        if not self.connected:
+            raise NetworkConnectorError('Failed to send file, connector is not connected!')
+
+        try:
+            return await _send_file(self.__socket, self.__send_lock, file, offset, count,
+                self.FILE_CHUNK_SIZE, progress, self.USE_SENDFILE)
+        except ConnectionError:
+            return await self.handle_disconnect()
 
     async def handle_received(self, data):
         pass
     
     async def handle_disconnect(self):
+        if not self.connected:
+            return
+
+        self.connected = False
+
         await self.__socket.close()
         await self.handle_disconnected()
 
     async def handle_disconnected(self):
-        raise NetworkConnectorError('Connector disconnected from (%s:%d)!' % (self.address, self.port)
+        raise NetworkConnectorError('Connector disconnected from (%s)!' % self.endpoint)
     
     async def execute(self):
-        try:
-            await self.__socket.connect((self.address, self.port))
-        except socket.error:
-            raise NetworkConnectorError('Failed to connect to server at (%s:%d)!' % (self.address,
-                self.port))
+        if not self.connected:
+            self.__socket = self.endpoint.socket()
+
+            try:
+                await self.__socket.connect(self.endpoint.sockaddr)
+            except socket.error:
+                raise NetworkConnectorError('Failed to connect to server at (%s)!' % self.endpoint)
+
+            self.connected = True
  
         await self.handle_connected()
 
         async with self.__socket:
-            while True:
+            while self.connected:
                 await self.__update()
     
     def run(self):
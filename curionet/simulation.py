@@ -0,0 +1,373 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 23rd, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+import time
+import struct
+import random
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from curio import run, spawn, sleep, Event, Queue, TaskGroup, ignore_after
+
+from curionet import network
+
+class SimulationError(RuntimeError):
+    """
+    A network simulation specific runtime error
+    """
+
+class NetworkConditions(object):
+    """
+    The faults injected into every simulated client connection, latency and jitter are in
+    seconds, loss and close are probabilities per message and bandwidth is the bytes per second
+    of the link to the server, which is shared by every client like a real uplink
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, bandwidth=None, loss=0.0, close=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.loss = loss
+        self.close = close
+
+class SimulationHandler(network.NetworkHandler):
+    """
+    A connection handler which echoes every message back to it's client,
+    and counts the traffic received by the simulation factory
+    """
+
+    async def handle_received(self, data):
+        self.factory.received += len(data)
+        await self.handle_send(data)
+
+class SimulationFactory(network.NetworkFactory):
+    """
+    A factory which signals once it is accepting connections
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.received = 0
+        self.started = Event()
+
+    async def handle_start(self):
+        await self.started.set()
+
+class SimulationConnector(network.NetworkConnector):
+    """
+    A simulated client which sends numbered messages one at a time and waits for each echo,
+    injecting the simulation's network conditions into every message it sends
+    """
+
+    HEADER = struct.Struct('!Id')
+
+    def __init__(self, simulation, index, address, port, connection=None):
+        super().__init__(address, port, connection)
+
+        self.simulation = simulation
+        self.index = index
+        self.random = random.Random('%d:%d' % (simulation.seed, index))
+
+        self.latencies = []
+        self.sent = 0
+        self.lost = 0
+        self.timed_out = 0
+        self.closed = False
+        self.error = None
+        self.done = Event()
+
+        self.__received = bytearray()
+        self.__replies = Queue()
+
+    async def handle_connected(self):
+        await spawn(self.__drive, daemon=True)
+
+    async def __drive(self):
+        conditions = self.simulation.conditions
+
+        try:
+            for sequence in range(self.simulation.messages):
+                if conditions.close and self.random.random() < conditions.close:
+                    self.closed = True
+                    return await self.handle_disconnect()
+
+                if not self.connected:
+                    return
+
+                timestamp = time.monotonic()
+                message = self.HEADER.pack(sequence, timestamp).ljust(self.simulation.message_size, b'\x00')
+
+                await self.handle_send(message)
+                self.sent += 1
+
+                if not await self.__wait_reply(sequence):
+                    continue
+
+                self.latencies.append(time.monotonic() - timestamp)
+
+                if self.simulation.interval:
+                    await sleep(self.simulation.interval)
+        finally:
+            await self.done.set()
+
+    async def __wait_reply(self, sequence):
+        deadline = time.monotonic() + self.simulation.timeout
+
+        while True:
+            reply = await ignore_after(max(deadline - time.monotonic(), 0), self.__replies.get)
+
+            if reply is None:
+                self.timed_out += 1
+                return False
+
+            # replies to messages which already timed out are skipped...
+            if reply == sequence:
+                return True
+
+    async def handle_send(self, data):
+        conditions = self.simulation.conditions
+
+        # the message is lost before it ever reaches the server
+        if conditions.loss and self.random.random() < conditions.loss:
+            self.lost += 1
+            return
+
+        delay = conditions.latency
+
+        if conditions.jitter:
+            delay += self.random.uniform(0, conditions.jitter)
+
+        if conditions.bandwidth:
+            delay += self.simulation.reserve_bandwidth(len(data))
+
+        if delay:
+            await sleep(delay)
+
+            # the connection may have closed while the message was delayed...
+            if not self.connected:
+                return
+
+        await super().handle_send(data)
+
+    async def handle_received(self, data):
+        self.__received.extend(data)
+
+        size = self.simulation.message_size
+
+        while len(self.__received) >= size:
+            (sequence, timestamp) = self.HEADER.unpack_from(self.__received)
+            del self.__received[:size]
+
+            await self.__replies.put(sequence)
+
+    async def handle_disconnected(self):
+        await self.done.set()
+
+class SimulationReport(object):
+    """
+    The results of a network simulation run, latencies are round trip times in seconds
+    """
+
+    def __init__(self, connectors, elapsed, received):
+        self.connectors = connectors
+        self.elapsed = elapsed
+        self.received = received
+
+        self.latencies = sorted(latency for connector in connectors for latency in connector.latencies)
+
+    @staticmethod
+    def nearest_rank(values, percent):
+        if not values:
+            return None
+
+        index = max(int(round(percent / 100.0 * len(values))) - 1, 0)
+        return values[min(index, len(values) - 1)]
+
+    def percentile(self, percent):
+        """
+        Returns the latency percentile over every message of every client
+        """
+
+        return self.nearest_rank(self.latencies, percent)
+
+    def client_percentiles(self, percent):
+        """
+        Returns the latency percentile of each client, by client index
+        """
+
+        return [self.nearest_rank(sorted(connector.latencies), percent) for connector in self.connectors]
+
+    @property
+    def sent(self):
+        return sum(connector.sent for connector in self.connectors)
+
+    @property
+    def lost(self):
+        return sum(connector.lost for connector in self.connectors)
+
+    @property
+    def timed_out(self):
+        return sum(connector.timed_out for connector in self.connectors)
+
+    @property
+    def closed(self):
+        return sum(1 for connector in self.connectors if connector.closed)
+
+    @property
+    def errors(self):
+        return [connector.error for connector in self.connectors if connector.error]
+
+    @property
+    def throughput(self):
+        """
+        Returns the bytes per second received by the server
+        """
+
+        if not self.elapsed:
+            return 0.0
+
+        return self.received / self.elapsed
+
+    @property
+    def message_rate(self):
+        """
+        Returns the round trips per second completed by every client
+        """
+
+        if not self.elapsed:
+            return 0.0
+
+        return len(self.latencies) / self.elapsed
+
+    def __str__(self):
+        lines = [
+            'clients: %d, elapsed: %.3fs' % (len(self.connectors), self.elapsed),
+            'sent: %d, completed: %d, lost: %d, timed out: %d, closed: %d, errors: %d' % (self.sent,
+                len(self.latencies), self.lost, self.timed_out, self.closed, len(self.errors)),
+            'server throughput: %.1f KiB/s, %.1f round trips/s' % (self.throughput / 1024.0,
+                self.message_rate),
+        ]
+
+        if self.latencies:
+            lines.append('latency p50: %.3fms, p90: %.3fms, p99: %.3fms, max: %.3fms' % tuple(
+                value * 1000.0 for value in (self.percentile(50), self.percentile(90),
+                self.percentile(99), self.latencies[-1])))
+
+            worst = [value for value in self.client_percentiles(99) if value is not None]
+
+            if worst:
+                lines.append('worst client p99: %.3fms' % (max(worst) * 1000.0))
+
+        return '\n'.join(lines)
+
+class NetworkSimulation(object):
+    """
+    A load and latency test harness with reproducible fault injection, which runs one factory and
+    many simulated clients in a single process over in-memory socket pairs or the loopback interface
+    """
+
+    SOCKETPAIR = 'socketpair'
+    LOOPBACK = 'loopback'
+
+    def __init__(self, handler=SimulationHandler, clients=1000, messages=10, message_size=64,
+        interval=0.0, timeout=5.0, conditions=None, transport=SOCKETPAIR, seed=0):
+
+        if transport not in (self.SOCKETPAIR, self.LOOPBACK):
+            raise SimulationError('Invalid simulation transport %r!' % transport)
+
+        if message_size < SimulationConnector.HEADER.size:
+            raise SimulationError('Invalid message size %d, must be at least %d bytes!' % (message_size,
+                SimulationConnector.HEADER.size))
+
+        self.handler = handler
+        self.clients = clients
+        self.messages = messages
+        self.message_size = message_size
+        self.interval = interval
+        self.timeout = timeout
+        self.conditions = conditions or NetworkConditions()
+        self.transport = transport
+        self.seed = seed
+
+        self.link_available = 0.0
+
+    def reserve_descriptors(self):
+        """
+        Raises the open file limit so every simulated connection fits, where permitted
+        """
+
+        if resource is None:
+            return
+
+        required = self.clients * 2 + 64
+        (soft, hard) = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+        if soft == resource.RLIM_INFINITY or soft >= required:
+            return
+
+        if hard != resource.RLIM_INFINITY:
+            required = min(required, hard)
+
+        resource.setrlimit(resource.RLIMIT_NOFILE, (required, hard))
+
+    def reserve_bandwidth(self, length):
+        """
+        Reserves the shared link for a message of length bytes, returns how long the
+        message is delayed by the messages queued before it and it's own transmission
+        """
+
+        now = time.monotonic()
+        self.link_available = max(self.link_available, now) + length / self.conditions.bandwidth
+
+        return self.link_available - now
+
+    async def __connector(self, factory, index):
+        if self.transport == self.SOCKETPAIR:
+            connection = await factory.handle_socketpair()
+            return SimulationConnector(self, index, factory.endpoint, None, connection=connection)
+
+        (address, port) = factory.sockname[:2]
+        return SimulationConnector(self, index, address, port)
+
+    async def __client(self, connector):
+        # the client is finished once it has sent all of it's messages
+        # or it's connection failed, whichever happens first...
+        async with TaskGroup(wait=any) as group:
+            await group.spawn(connector.execute)
+            await group.spawn(connector.done.wait)
+
+        connector.error = group.exception
+
+    async def execute(self):
+        # socket pair clients never connect to the listener, it is only
+        # bound to an ephemeral loopback port for the factory to run...
+        factory = SimulationFactory('127.0.0.1', 0, self.handler, backlog=self.clients)
+        self.link_available = 0.0
+
+        factory_task = await spawn(factory.execute)
+        await factory.started.wait()
+
+        connectors = [await self.__connector(factory, index) for index in range(self.clients)]
+        started = time.monotonic()
+
+        async with TaskGroup() as group:
+            for connector in connectors:
+                await group.spawn(self.__client, connector)
+
+        elapsed = time.monotonic() - started
+
+        await factory.handle_drain(self.timeout)
+        await factory_task.join()
+
+        return SimulationReport(connectors, elapsed, factory.received)
+
+    def run(self):
+        self.reserve_descriptors()
+        return run(self.execute)
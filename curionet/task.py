@@ -4,7 +4,11 @@
  * Licensing information can found in 'LICENSE', which is part of this source code package.
 """
 
+import os
 import time
+import json
+import heapq
+import datetime
 import threading
 
 class TaskResult(object):
@@ -30,7 +34,7 @@ class Task(object):
         self.id = id
         self.name = '%s-%d' % (self.__class__.__name__, id)
         self.function = None
-        self.timestamp = time.time()
+        self.timestamp = time.monotonic()
         self.delay = 0.0
         self.can_delay = True
         self.args = []
@@ -55,7 +59,7 @@ class Task(object):
         Returns the amount of time in ms, in which the task has been running for
         """
 
-        return time.time() - self.timestamp
+        return time.monotonic() - self.timestamp
 
     def execute(self):
         """
@@ -69,7 +73,7 @@ class Task(object):
             if self.duration < self.delay:
                 return self.again
             else:
-                self.timestamp = time.time()
+                self.timestamp = time.monotonic()
 
         return self.function(self, *self.args, **self.kwargs)
 
@@ -90,6 +94,229 @@ class Task(object):
 
         self.id = self.name = self.function = self.timestamp = self.args = self.kwargs = None
 
+class CatchUpPolicy(object):
+    """
+    A enum for how a recurring task handles ticks it missed, a tick is missed
+    once the tick following it is also due
+    """
+
+    SKIP = 0
+    COALESCE = 1
+    RUN_ALL = 2
+
+class ScheduleError(ValueError):
+    """
+    A schedule specific value error
+    """
+
+class Schedule(object):
+    """
+    A recurring schedule, which calculates the monotonic deadlines of it's ticks. Subclasses
+    provide first(now), the deadline of the first tick, and next(deadline, now), the deadline
+    of the tick following the tick at deadline
+    """
+
+    # whether the ticks are fixed in time and can be missed
+    CAN_MISS = True
+
+    def after(self, deadline, now):
+        """
+        Returns the deadline of the first tick after now
+        """
+
+        deadline = self.next(deadline, now)
+
+        while deadline <= now:
+            deadline = self.next(deadline, now)
+
+        return deadline
+
+class FixedRateSchedule(Schedule):
+    """
+    A schedule which ticks every interval seconds, measured from the first tick
+    """
+
+    def __init__(self, interval, delay=None):
+        if interval <= 0:
+            raise ScheduleError('Invalid schedule interval %r, must be positive!' % interval)
+
+        self.interval = interval
+        self.delay = interval if delay is None else delay
+
+    def first(self, now):
+        return now + self.delay
+
+    def next(self, deadline, now):
+        return deadline + self.interval
+
+    def after(self, deadline, now):
+        return deadline + self.interval * (int((now - deadline) // self.interval) + 1)
+
+class FixedDelaySchedule(FixedRateSchedule):
+    """
+    A schedule which ticks interval seconds after the previous tick finished running
+    """
+
+    CAN_MISS = False
+
+    def next(self, deadline, now):
+        return now + self.interval
+
+    def after(self, deadline, now):
+        return now + self.interval
+
+class CronSchedule(Schedule):
+    """
+    A schedule which ticks on the local wall clock times matched by a cron expression,
+    with the fields (minute, hour, day of month, month, day of week)
+    """
+
+    FIELDS = (
+        ('minute', 0, 59),
+        ('hour', 0, 23),
+        ('day', 1, 31),
+        ('month', 1, 12),
+        ('weekday', 0, 7),
+    )
+
+    # the furthest a matching time is searched for, in years
+    SEARCH_YEARS = 8
+
+    def __init__(self, expression):
+        fields = expression.split()
+
+        if len(fields) != len(self.FIELDS):
+            raise ScheduleError('Invalid cron expression %r, expected %d fields!' % (expression,
+                len(self.FIELDS)))
+
+        self.expression = expression
+        (self.minutes, self.hours, self.days, self.months, self.weekdays) = [
+            self.parse_field(field, name, low, high) for (field, (name, low, high)) in zip(fields, self.FIELDS)]
+
+        # both sunday (0) and (7) are allowed
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - set([7])) | set([0])
+
+        # cron matches either day field when both are restricted
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def parse_field(field, name, low, high):
+        values = set()
+
+        for part in field.split(','):
+            (span, step) = (part.split('/') + [None])[:2]
+
+            try:
+                step = int(step) if step is not None else 1
+
+                if span == '*':
+                    (start, end) = (low, high)
+                elif '-' in span:
+                    (start, end) = [int(value) for value in span.split('-', 1)]
+                else:
+                    start = int(span)
+                    end = high if step != 1 else start
+            except ValueError:
+                raise ScheduleError('Invalid cron %s field %r!' % (name, field))
+
+            if step <= 0 or start < low or end > high or start > end:
+                raise ScheduleError('Invalid cron %s field %r, out of range (%d-%d)!' % (name, field,
+                    low, high))
+
+            values.update(range(start, end + 1, step))
+
+        return values
+
+    def matches_day(self, date):
+        weekday = (date.weekday() + 1) % 7
+        day = date.day in self.days
+        weekday = weekday in self.weekdays
+
+        if self.any_day and self.any_weekday:
+            return True
+        elif self.any_day:
+            return weekday
+        elif self.any_weekday:
+            return day
+
+        return day or weekday
+
+    def next_time(self, when):
+        """
+        Returns the first wall clock time matching the expression after when
+        """
+
+        when = when.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = when.year + self.SEARCH_YEARS
+
+        while when.year <= limit:
+            if when.month not in self.months:
+                if when.month == 12:
+                    when = when.replace(year=when.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    when = when.replace(month=when.month + 1, day=1, hour=0, minute=0)
+            elif not self.matches_day(when):
+                when = (when + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif when.hour not in self.hours:
+                when = (when + datetime.timedelta(hours=1)).replace(minute=0)
+            elif when.minute not in self.minutes:
+                when += datetime.timedelta(minutes=1)
+            else:
+                return when
+
+        raise ScheduleError('Cron expression %r never matches!' % self.expression)
+
+    @staticmethod
+    def to_monotonic(when, now):
+        return now + (time.mktime(when.timetuple()) - time.time())
+
+    @staticmethod
+    def to_datetime(deadline, now):
+        return datetime.datetime.fromtimestamp(time.time() + (deadline - now))
+
+    def first(self, now):
+        return self.to_monotonic(self.next_time(datetime.datetime.now()), now)
+
+    def next(self, deadline, now):
+        return self.to_monotonic(self.next_time(self.to_datetime(deadline, now)), now)
+
+    def after(self, deadline, now):
+        return self.first(now)
+
+class ScheduledTask(Task):
+    """
+    A recurring task instance, which runs on the ticks of it's schedule until it returns done
+    """
+
+    def __init__(self, id, schedule, policy=CatchUpPolicy.SKIP, name=None):
+        super().__init__(id)
+
+        # only named tasks are journaled, the generated names
+        # are not stable between restarts.
+        self.named = name is not None
+
+        if name is not None:
+            self.name = name
+
+        self.schedule = schedule
+        self.policy = policy
+        self.deadline = None
+        self.indexed = False
+        self.can_delay = False
+
+    def execute(self):
+        if not callable(self.function):
+            raise TaskError('Failed to execute task %s, function not callable!' % self.name)
+
+        self.timestamp = time.monotonic()
+        return self.function(self, *self.args, **self.kwargs)
+
+    def destroy(self):
+        super().destroy()
+        self.schedule = self.deadline = None
+
 class TaskManagerError(RuntimeError):
     """
     A task manager specific runtime error
@@ -102,12 +329,25 @@ class TaskManager(object):
     """
 
     TIMEOUT = 0.01
+    JOURNAL_INTERVAL = 1.0
 
-    def __init__(self):
+    def __init__(self, journal=None):
         self.running = {}
         self.waiting = {}
+        self.scheduled = {}
         self.id = 0
 
+        # recurring tasks are indexed by their next deadline, so only
+        # the tasks which are due are looked at on every cycle.
+        self.deadlines = []
+        self.stale_deadlines = 0
+        self.lock = threading.Lock()
+
+        self.journal = journal
+        self.journaled = self.load_journal()
+        self.journal_dirty = False
+        self.journal_timestamp = time.monotonic()
+
     @property
     def next_id(self):
         """
@@ -121,16 +361,29 @@ class TaskManager(object):
         Returns true if the task exists in the queue else false
         """
 
-        return name in self.running or name in self.waiting
+        return name in self.running or name in self.waiting or name in self.scheduled
 
     def delete(self, task, destroy):
         """
         Removes a specific task from which ever queue its currently in
         """
 
-        try:
+        if task.name in self.scheduled:
+            # the task's deadline is left in the index, and is discarded once it is
+            # due as the task is inactive, or when the index is next compacted.
+            with self.lock:
+                del self.scheduled[task.name]
+                self.journal_dirty = True
+
+                # a task which is running has no deadline in the index...
+                if task.indexed:
+                    task.indexed = False
+                    self.stale_deadlines += 1
+
+                self.compact_deadlines()
+        elif task.name in self.waiting:
             del self.waiting[task.name]
-        except KeyError:
+        else:
             del self.running[task.name]
 
         if destroy:
@@ -203,6 +456,91 @@ class TaskManager(object):
 
         return decorate
 
+    def push_deadline(self, task, deadline):
+        # a deadline which is moved leaves it's previous one behind in the index...
+        if task.indexed:
+            self.stale_deadlines += 1
+
+        task.deadline = deadline
+        task.indexed = True
+        heapq.heappush(self.deadlines, (deadline, task.id, task))
+
+    def compact_deadlines(self):
+        """
+        Rebuilds the deadline index from the scheduled tasks, once the deadlines
+        of removed tasks outnumber those of the tasks which are still scheduled
+        """
+
+        if self.stale_deadlines <= len(self.deadlines) - self.stale_deadlines:
+            return
+
+        self.deadlines = [(task.deadline, task.id, task) for task in self.scheduled.values() if task.indexed]
+        self.stale_deadlines = 0
+
+        heapq.heapify(self.deadlines)
+
+    def activate_scheduled(self, task):
+        """
+        Activates a recurring task and indexes it by the deadline of it's first tick,
+        or by it's journaled deadline if the task was scheduled before a restart
+        """
+
+        if self.has(task.name):
+            raise TaskManagerError('Failed to activate task %s, already activated!' % task.name)
+
+        task.active = True
+        now = time.monotonic()
+
+        with self.lock:
+            wall_deadline = self.journaled.pop(task.name, None)
+
+            if wall_deadline is not None:
+                deadline = now + (wall_deadline - time.time())
+            else:
+                deadline = task.schedule.first(now)
+
+            self.scheduled[task.name] = task
+            self.push_deadline(task, deadline)
+            self.journal_dirty = True
+
+        return task
+
+    def add_scheduled(self, schedule, function, *args, name=None, policy=CatchUpPolicy.SKIP, **kwargs):
+        """
+        Adds a new recurring task to the task manager, which runs on every tick of the schedule
+        until it returns done. Only named tasks can be restored from the journal after a restart
+        """
+
+        task = ScheduledTask(self.next_id, schedule, policy, name)
+        task.function = function
+        task.args = args
+        task.kwargs = kwargs
+
+        return self.activate_scheduled(task)
+
+    def add_fixed_rate(self, interval, function, *args, name=None, policy=CatchUpPolicy.SKIP, **kwargs):
+        """
+        Adds a new recurring task which runs every interval seconds
+        """
+
+        return self.add_scheduled(FixedRateSchedule(interval), function, *args, name=name,
+            policy=policy, **kwargs)
+
+    def add_fixed_delay(self, interval, function, *args, name=None, **kwargs):
+        """
+        Adds a new recurring task which runs interval seconds after it last finished running
+        """
+
+        return self.add_scheduled(FixedDelaySchedule(interval), function, *args, name=name, **kwargs)
+
+    def add_cron(self, expression, function, *args, name=None, policy=CatchUpPolicy.SKIP, **kwargs):
+        """
+        Adds a new recurring task which runs on the times matched by a cron expression
+        """
+
+        return self.add_scheduled(CronSchedule(expression), function, *args, name=name,
+            policy=policy, **kwargs)
+
     def remove(self, task):
         """
         Removes and destroys the task fron the queue
@@ -221,6 +559,105 @@ class TaskManager(object):
         # reactivate the task in the queue
         self.activate(task)
 
+    def pop_due(self, now):
+        """
+        Pops the next recurring task whose deadline is due, skipping
+        deadlines of tasks which have been removed or rescheduled
+        """
+
+        with self.lock:
+            while self.deadlines and self.deadlines[0][0] <= now:
+                (deadline, id, task) = heapq.heappop(self.deadlines)
+
+                if task.active and task.deadline == deadline and self.scheduled.get(task.name) is task:
+                    task.indexed = False
+                    return task
+
+                self.stale_deadlines -= 1
+
+        return None
+
+    def run_scheduled(self):
+        """
+        Runs every recurring task which is due, applying the task's catch up policy
+        to the ticks it missed and indexing the task by it's next deadline
+        """
+
+        now = time.monotonic()
+        task = self.pop_due(now)
+
+        while task is not None:
+            schedule = task.schedule
+            following = schedule.next(task.deadline, now)
+
+            if not schedule.CAN_MISS or following > now or task.policy == CatchUpPolicy.RUN_ALL:
+                # every missed tick is ran in turn, as the following
+                # tick is already due it is ran on the next pass...
+                run = True
+            else:
+                run = task.policy == CatchUpPolicy.COALESCE
+                following = schedule.after(task.deadline, now)
+
+            if run and task.run() == TaskResult.DONE:
+                self.remove(task)
+            elif task.active:
+                if not schedule.CAN_MISS:
+                    following = schedule.next(task.deadline, time.monotonic())
+
+                with self.lock:
+                    self.push_deadline(task, following)
+                    self.journal_dirty = True
+
+            task = self.pop_due(now)
+
+        if self.journal_dirty and now - self.journal_timestamp >= self.JOURNAL_INTERVAL:
+            self.write_journal()
+
+    def load_journal(self):
+        """
+        Loads the wall clock deadlines of the named recurring tasks from the journal
+        """
+
+        if not self.journal or not os.path.exists(self.journal):
+            return {}
+
+        try:
+            with open(self.journal, 'r') as f:
+                return dict(json.load(f))
+        except (IOError, ValueError, TypeError):
+            raise TaskManagerError('Failed to load task journal %s!' % self.journal)
+
+    def write_journal(self):
+        """
+        Writes the wall clock deadline of every named recurring task to the journal,
+        replacing the previous journal atomically
+        """
+
+        if not self.journal:
+            return
+
+        now = time.monotonic()
+        wall = time.time()
+
+        with self.lock:
+            # journaled tasks which have not been added again since
+            # the restart are kept, so that they are not lost...
+            deadlines = dict(self.journaled)
+
+            for task in self.scheduled.values():
+                if task.named:
+                    deadlines[task.name] = round(wall + (task.deadline - now), 3)
+
+            self.journal_dirty = False
+            self.journal_timestamp = now
+
+        temporary = '%s.tmp' % self.journal
+
+        with open(temporary, 'w') as f:
+            json.dump(sorted(deadlines.items()), f, separators=(',', ':'))
+
+        os.replace(temporary, self.journal)
+
     def execute(self):
         """
         Main task manager loop, executes tasks one by one
@@ -246,6 +683,8 @@ class TaskManager(object):
                 else:
                     self.remove(task)
 
+            self.run_scheduled()
+
             # pause the process for a specified amount of time
             # to help reduce the overall cpu load.
             time.sleep(self.TIMEOUT)
@@ -276,4 +715,12 @@ class TaskManager(object):
         for name in list(self.running):
             self.running.pop(name).destroy()
 
+        if self.journal_dirty:
+            self.write_journal()
+
+        for name in list(self.scheduled):
+            self.scheduled.pop(name).destroy()
+
+        self.deadlines = []
+        self.stale_deadlines = 0
         self.id = 0
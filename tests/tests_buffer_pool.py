@@ -0,0 +1,81 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 27th, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+from curio import run, socket
+
+from curionet import io, network
+
+pool = io.DataBufferPool()
+
+# the first acquisition misses, the buffer is then reused...
+with pool.buffer() as data_buffer:
+    data_buffer.write_ushort(1)
+    data_buffer.write(b'x' * 300)
+
+    # writing past the size class grows the buffer into the next one.
+    assert data_buffer.capacity == 1024
+
+with pool.buffer() as data_buffer:
+    assert data_buffer.capacity == 1024
+    assert len(data_buffer.data) == 0
+
+assert (pool.hits, pool.misses, pool.in_use) == (1, 1, 0)
+
+buffers = [pool.acquire() for i in range(4)]
+
+for data_buffer in buffers:
+    data_buffer.release()
+
+assert pool.high_water == 4 and pool.in_use == 0
+
+# past the largest size class the buffer doubles instead of growing on every write.
+with pool.buffer() as data_buffer:
+    capacities = set()
+
+    for i in range(1024):
+        data_buffer.write(b'x' * 1024)
+        capacities.add(data_buffer.capacity)
+
+    assert len(data_buffer.data) == 1024 * 1024
+    assert sorted(capacities)[-3:] == [262144, 524288, 1048576], sorted(capacities)
+
+async def main():
+    (connection, peer) = socket.socketpair()
+    connector = network.NetworkConnector('unix:@curionet', None, connection=connection)
+
+    with pool.buffer() as data_buffer:
+        data_buffer.write_ushort(2)
+        data_buffer.write_double(1.5)
+
+        # sending a pooled buffer returns it to the pool...
+        await connector.handle_send(data_buffer)
+        assert data_buffer.released
+
+        # so the next owner can be handed the same buffer, leaving
+        # the with block must not release it from under them.
+        other_buffer = pool.acquire()
+        assert other_buffer is data_buffer
+
+    assert not other_buffer.released
+    other_buffer.release()
+
+    # sending a buffer which was already released is an error.
+    try:
+        await connector.handle_send(other_buffer)
+    except io.DataBufferPoolError as e:
+        print ('Refused to send a released buffer: %s' % e)
+    else:
+        raise AssertionError('A released buffer was sent!')
+
+    data = await peer.recv(1024)
+    assert io.DataBufferIO(data).read_ushort() == 2
+
+    await connection.close()
+    await peer.close()
+
+run(main)
+
+print (pool.stats())
@@ -0,0 +1,53 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 27th, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+from curio import run
+
+from curionet import io, network
+
+dispatcher = network.NetworkDispatcher()
+
+class ExampleHandler(object):
+    """
+    An example target for the dispatcher, usually a NetworkHandler
+    """
+
+    @dispatcher.route(1, 'If')
+    async def handle_move(self, entity_id, x):
+        print ('Entity %d moved to %f.' % (entity_id, x))
+
+    @dispatcher.route(2)
+    async def handle_chat(self, data_buffer):
+        print ('Chat message %r.' % data_buffer.remaining)
+
+    @dispatcher.fallback
+    async def handle_unknown(self, opcode, data_buffer):
+        print ('Unknown opcode %d.' % opcode)
+
+async def main():
+    handler = ExampleHandler()
+
+    for (opcode, payload) in ((1, b'\x00\x00\x00\x07\x3f\x80\x00\x00'), (2, b'Hello World!'), (3, b'')):
+        data_buffer = io.DataBufferIO()
+        data_buffer.write_ushort(opcode)
+        data_buffer.write(payload)
+
+        await dispatcher.dispatch(handler, data_buffer.data)
+
+    # messages too short for an opcode, or for the route's schema,
+    # raise an error instead of crashing the handler.
+    for data in (b'\x00', b'\x00\x01\x00\x00'):
+        try:
+            await dispatcher.dispatch(handler, data)
+        except network.NetworkDispatcherError as e:
+            print ('Dropped malformed message %r: %s' % (data, e))
+        else:
+            raise AssertionError('Malformed message %r was dispatched!' % data)
+
+    print (dispatcher.counters, dispatcher.unknown)
+
+if __name__ == '__main__':
+    run(main)
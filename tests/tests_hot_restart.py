@@ -0,0 +1,134 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 23rd, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+import os
+import time
+import tempfile
+
+from curio import run, spawn, sleep, socket
+
+from curionet import network
+
+class ExampleHandler(network.NetworkHandler):
+    """
+    An example connection handler derived from NetworkHandler
+    """
+
+    async def handle_received(self, data):
+        # send the data back to the client.
+        await self.handle_send(data)
+
+    async def handle_drain(self):
+        # tell the client to reconnect, then hang up without waiting for it.
+        await self.handle_send(b'bye')
+        await self.handle_disconnect()
+
+class ExampleFactory(network.NetworkFactory):
+    """
+    An example factory derived from NetworkFactory
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.started = False
+        self.stopped = False
+
+    async def handle_start(self):
+        self.started = True
+
+    async def handle_stop(self):
+        self.stopped = True
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, 'Timed out waiting for %r!' % condition
+        await sleep(0.01)
+
+async def free_port():
+    async with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def connect(port):
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    await client.connect(('127.0.0.1', port))
+    return client
+
+async def echo(client, data):
+    await client.sendall(data)
+    assert await client.recv(len(data)) == data
+
+async def test_drain(handoff):
+    port = await free_port()
+    factory = ExampleFactory('127.0.0.1', port, ExampleHandler, handoff=handoff)
+    factory.drain_timeout = 3.0
+
+    factory_task = await spawn(factory.execute)
+    await wait_for(lambda: factory.started)
+
+    client = await connect(port)
+    await echo(client, b'Hello World!')
+    await wait_for(lambda: len(factory.handlers) == 1)
+
+    # every handler disconnects from it's drain hook, so the drain ends
+    # right away instead of lasting the whole drain timeout.
+    started = time.monotonic()
+    await factory.handle_drain()
+    await factory_task.join()
+    elapsed = time.monotonic() - started
+
+    assert factory.stopped
+    assert not factory.handlers
+    assert elapsed < 1.0, 'Drain took %.3fs!' % elapsed
+    assert await client.recv(3) == b'bye'
+    assert await client.recv(1) == b''
+
+    await client.close()
+    print ('Drained in %.4fs.' % elapsed)
+
+async def test_handoff(handoff):
+    port = await free_port()
+    old = ExampleFactory('127.0.0.1', port, ExampleHandler, handoff=handoff)
+    old_task = await spawn(old.execute)
+    await wait_for(lambda: old.started)
+
+    client = await connect(port)
+    await echo(client, b'old')
+
+    # the replacement factory adopts the listening socket of the old one, which drains
+    # it's existing connections and stops. Binding the port again would fail...
+    new = ExampleFactory('127.0.0.1', port, ExampleHandler, handoff=handoff)
+    new_task = await spawn(new.execute)
+    await wait_for(lambda: new.started)
+
+    await old_task.join()
+    assert old.stopped
+    assert await client.recv(3) == b'bye'
+    await client.close()
+
+    client = await connect(port)
+    await echo(client, b'new')
+    await wait_for(lambda: len(new.handlers) == 1)
+    await client.close()
+
+    await new.handle_drain(1.0)
+    await new_task.join()
+    assert new.stopped
+
+    print ('Handed 127.0.0.1:%d over to the replacement factory.' % port)
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        handoff = os.path.join(directory, 'curionet.sock')
+
+        await test_drain(handoff)
+        await test_handoff(handoff)
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,81 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 23rd, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATEMENTS = (
+    'import curionet',
+    'from curionet import io',
+    'from curionet import task',
+    'from curionet import network',
+)
+
+def import_times(statement):
+    """
+    Runs the statement in a fresh interpreter with -X importtime,
+    returns the self import time in microseconds of every module imported
+    """
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE, env=env, universal_newlines=True, check=True)
+
+    modules = {}
+
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        (self_time, cumulative, name) = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_time)
+
+    return modules
+
+def import_time(statement):
+    """
+    Returns the import time in microseconds of the statement and the modules it imported,
+    modules already imported by the interpreter on startup are excluded
+    """
+
+    startup = import_times('pass')
+    modules = dict((name, time) for (name, time) in import_times(statement).items()
+        if name not in startup)
+
+    return (sum(modules.values()), modules)
+
+if __name__ == '__main__':
+    for statement in STATEMENTS:
+        (total, modules) = import_time(statement)
+        print ('%-32s %8d us %4d modules' % (statement, total, len(modules)))
+
+        # only the network stack should depend on curio.
+        if 'network' not in statement:
+            assert 'curio' not in modules, '%r imported curio!' % statement
+
+    import curionet
+
+    # loaded submodules are listed once.
+    curionet.io
+    assert sorted(set(dir(curionet))) == dir(curionet), dir(curionet)
+
+    # the connector's socket is only created once it is ran.
+    from curio import run
+
+    async def send_unconnected():
+        connector = curionet.network.NetworkConnector('127.0.0.1', 8080)
+
+        for send in (connector.handle_send(b'Hello World!'), connector.send_file(__file__)):
+            try:
+                await send
+            except curionet.network.NetworkConnectorError as e:
+                print ('Refused to send before connecting: %s' % e)
+            else:
+                raise AssertionError('Sent data before connecting!')
+
+    run(send_unconnected)
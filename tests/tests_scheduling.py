@@ -0,0 +1,81 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 27th, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+import os
+import time
+import datetime
+import tempfile
+
+from curionet import task
+
+ticks = []
+
+def tick(task, policy):
+    ticks.append(policy)
+    return task.cont
+
+def miss(task_manager, scheduled, count):
+    """
+    Moves the task's deadline back, as if it missed the specified amount of ticks
+    """
+
+    task_manager.push_deadline(scheduled, time.monotonic() - scheduled.schedule.interval * count)
+
+task_manager = task.TaskManager()
+
+# missed ticks are either skipped, coalesced into a single run or all ran in turn.
+for policy in (task.CatchUpPolicy.SKIP, task.CatchUpPolicy.COALESCE, task.CatchUpPolicy.RUN_ALL):
+    scheduled = task_manager.add_fixed_rate(60.0, tick, policy, policy=policy)
+    miss(task_manager, scheduled, 3.5)
+
+    task_manager.run_scheduled()
+    task_manager.remove(scheduled)
+
+assert ticks.count(task.CatchUpPolicy.SKIP) == 0
+assert ticks.count(task.CatchUpPolicy.COALESCE) == 1
+assert ticks.count(task.CatchUpPolicy.RUN_ALL) == 4
+
+# a tick that is late, but not yet missed, always runs...
+scheduled = task_manager.add_fixed_rate(60.0, tick, 'late')
+miss(task_manager, scheduled, 0.5)
+task_manager.run_scheduled()
+
+assert ticks.count('late') == 1 and scheduled.deadline > time.monotonic()
+task_manager.remove(scheduled)
+
+# thousands of recurring tasks, only the due ones are looked at.
+for index in range(5000):
+    task_manager.add_fixed_delay(3600.0, tick, 'idle')
+
+start = time.monotonic()
+task_manager.run_scheduled()
+print ('Evaluated %d recurring tasks in %.3fms.' % (len(task_manager.scheduled),
+    (time.monotonic() - start) * 1000.0))
+
+# removed tasks don't leave their deadlines behind in the index forever.
+for index in range(20000):
+    task_manager.remove(task_manager.add_fixed_rate(3600.0, tick, 'churn'))
+
+assert len(task_manager.deadlines) <= len(task_manager.scheduled) * 2, len(task_manager.deadlines)
+
+cron = task.CronSchedule('*/15 9-17 * * 1-5')
+when = cron.next_time(datetime.datetime(2017, 5, 27, 12, 0))
+assert when == datetime.datetime(2017, 5, 29, 9, 0), when
+assert cron.next_time(when) == datetime.datetime(2017, 5, 29, 9, 15)
+
+# named recurring tasks keep their deadlines across restarts with a journal.
+journal = os.path.join(tempfile.mkdtemp(), 'tasks.journal')
+
+task_manager = task.TaskManager(journal=journal)
+scheduled = task_manager.add_cron('0 0 1 1 *', tick, 'cron', name='new-year')
+deadline = scheduled.deadline
+task_manager.destroy()
+
+task_manager = task.TaskManager(journal=journal)
+scheduled = task_manager.add_cron('0 0 1 1 *', tick, 'cron', name='new-year')
+assert abs(scheduled.deadline - deadline) < 0.01
+
+print ('Journal %s: %s' % (journal, open(journal).read()))
@@ -0,0 +1,120 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 23rd, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+import os
+import tempfile
+import threading
+
+from curio import run, spawn, sleep, socket
+
+from curionet import network
+
+class ExampleConnector(network.NetworkConnector):
+    """
+    An example connector derived from NetworkConnector
+    """
+
+class ExampleFallbackConnector(network.NetworkConnector):
+    """
+    An example connector which streams through a user space buffer instead of os.sendfile
+    """
+
+    USE_SENDFILE = False
+
+payload = os.urandom(network.NetworkConnector.FILE_CHUNK_SIZE * 4 + 1234)
+
+async def receive(peer, length):
+    data = bytearray()
+
+    while len(data) < length:
+        chunk = await peer.recv(65536)
+
+        if not chunk:
+            break
+
+        data.extend(chunk)
+
+    return bytes(data)
+
+async def stream(connector_class, file, offset=0, count=None, length=len(payload)):
+    (connection, peer) = socket.socketpair()
+    connector = connector_class('unix:@curionet', None, connection=connection)
+    progress = []
+
+    receiver = await spawn(receive, peer, length)
+    sent = await connector.send_file(file, offset, count, progress=lambda sent, count: progress.append(sent))
+    data = await receiver.join()
+
+    await connection.close()
+    await peer.close()
+
+    return (sent, data, progress)
+
+async def main():
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(payload)
+        f.flush()
+
+        for connector_class in (ExampleConnector, ExampleFallbackConnector):
+            (sent, data, progress) = await stream(connector_class, f.name)
+
+            assert sent == len(payload) and data == payload
+            assert len(progress) == 5 and progress[-1] == len(payload)
+
+            # streaming part of the file...
+            (sent, data, progress) = await stream(connector_class, f.name, 100, 70000, 70000)
+            assert data == payload[100:70100]
+
+            print ('Streamed %d bytes with %s.' % (len(payload), connector_class.__name__))
+
+    # non-seekable files are streamed until the end of file.
+    (read_fd, write_fd) = os.pipe()
+
+    def write():
+        with os.fdopen(write_fd, 'wb') as w:
+            w.write(payload)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+
+    (sent, data, progress) = await stream(ExampleConnector, read_fd)
+    thread.join()
+    os.close(read_fd)
+
+    assert sent == len(payload) and data == payload
+    print ('Streamed %d bytes from a pipe.' % sent)
+
+    # a slowly written pipe must not block the kernel while it is waited on.
+    (read_fd, write_fd) = os.pipe()
+    ticks = []
+
+    async def write_slowly():
+        with os.fdopen(write_fd, 'wb', buffering=0) as w:
+            for index in range(0, len(payload), 65536):
+                await sleep(0.05)
+                w.write(payload[index:index + 65536])
+
+    async def tick():
+        while True:
+            ticks.append(None)
+            await sleep(0.01)
+
+    writer = await spawn(write_slowly)
+    ticker = await spawn(tick, daemon=True)
+
+    (sent, data, progress) = await stream(ExampleConnector, read_fd)
+    await writer.join()
+    await ticker.cancel()
+
+    assert sent == len(payload) and data == payload
+    assert os.get_blocking(read_fd), 'The pipe was left non-blocking!'
+    assert len(ticks) > 10, 'The kernel was blocked reading the pipe (%d ticks)!' % len(ticks)
+    os.close(read_fd)
+
+    print ('Streamed %d bytes from a slow pipe, %d ticks.' % (sent, len(ticks)))
+
+if __name__ == '__main__':
+    run(main)
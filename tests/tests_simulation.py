@@ -0,0 +1,37 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 23rd, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+from curionet import simulation
+
+if __name__ == '__main__':
+    # thousands of clients over in-memory socket pairs, without any faults...
+    report = simulation.NetworkSimulation(clients=2000, messages=5).run()
+    print (report)
+
+    assert not report.errors
+    assert len(report.latencies) == report.sent == 2000 * 5
+
+    # and over the loopback interface, with latency, a bandwidth cap and faults injected.
+    conditions = simulation.NetworkConditions(latency=0.005, jitter=0.005, bandwidth=1048576,
+        loss=0.05, close=0.02)
+
+    report = simulation.NetworkSimulation(clients=500, messages=10, timeout=0.5, conditions=conditions,
+        transport=simulation.NetworkSimulation.LOOPBACK, seed=1).run()
+    print (report)
+
+    # lost messages are never echoed, so every one of them times out
+    assert report.lost == report.timed_out
+    assert report.percentile(50) >= conditions.latency
+
+    # the bandwidth is shared by every client, so it caps the server throughput.
+    conditions = simulation.NetworkConditions(bandwidth=1048576)
+
+    report = simulation.NetworkSimulation(clients=200, messages=5, message_size=1024,
+        conditions=conditions, seed=1).run()
+    print (report)
+
+    assert not report.errors and report.timed_out == 0
+    assert report.throughput <= conditions.bandwidth * 1.05, report.throughput
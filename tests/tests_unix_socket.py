@@ -0,0 +1,50 @@
+"""
+ * Copyright (C) Caleb Marshall and others... - All Rights Reserved
+ * Written by Caleb Marshall <anythingtechpro@gmail.com>, May 23rd, 2017
+ * Licensing information can found in 'LICENSE', which is part of this source code package.
+"""
+
+from curio import run, spawn
+
+from curionet import network
+
+class ExampleHandler(network.NetworkHandler):
+    """
+    An example connection handler derived from NetworkHandler
+    """
+
+    async def handle_received(self, data):
+        print ('Data recieved from (%s: %r)!' % (self.factory.endpoint, data))
+
+        # send the data back to the client.
+        await self.handle_send(data)
+
+class ExampleConnector(network.NetworkConnector):
+    """
+    An example connector derived from NetworkConnector
+    """
+
+    async def handle_connected(self):
+        print ('Connected to %s.' % self.endpoint)
+
+        # send the server some data...
+        await self.handle_send(b'Hello World!')
+
+    async def handle_received(self, data):
+        print ('Data recieved from server (%s: %r)!' % (self.endpoint, data))
+
+async def main():
+    # unix domain socket paths (unix:/path), abstract unix sockets (unix:@name)
+    # and ipv6 addresses are all accepted in place of an ipv4 address.
+    factory = network.NetworkFactory('unix:@curionet', None, ExampleHandler)
+    await spawn(factory.execute, daemon=True)
+
+    # connect over the unix socket...
+    await spawn(ExampleConnector('unix:@curionet', None).execute, daemon=True)
+
+    # and over an in-process socket pair, skipping the listening socket entirely.
+    connection = await factory.handle_socketpair()
+    await ExampleConnector(factory.endpoint, None, connection=connection).execute()
+
+if __name__ == '__main__':
+    run(main)